@@ -12,6 +12,10 @@ class Factura:
     nombre_archivo: str
     fecha_procesamiento: datetime = field(default_factory=datetime.now)
     
+    # Si la factura viene dentro de un ZIP, 'ruta_archivo' es el ZIP
+    # y este campo la ruta del documento dentro del archivo comprimido
+    miembro_archivo: Optional[str] = None
+    
     # Estos campos se llenarán después del OCR
     texto_crudo: Optional[str] = None
     
@@ -38,4 +42,19 @@ class Factura:
     def __post_init__(self):
         """Validaciones básicas al crear la entidad."""
         if not self.ruta_archivo:
-            raise ValueError("La factura debe tener una ruta de archivo válida.")
\ No newline at end of file
+            raise ValueError("La factura debe tener una ruta de archivo válida.")
+
+
+@dataclass
+class TareaCola:
+    """
+    Tarea reservada de la cola de trabajo distribuida.
+    Representa un archivo tomado por un trabajador mientras dure su lease.
+    """
+    id: int
+    ruta_archivo: str
+    nombre_archivo: str
+    miembro_archivo: Optional[str]
+    intentos: int
+    trabajador: str
+    lease_expira: float
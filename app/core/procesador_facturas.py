@@ -1,5 +1,6 @@
 from typing import List
 import re
+from pathlib import PurePosixPath
 from app.core.entidades import Factura
 from app.infra.repositorio_archivos import RepositorioArchivos
 from app.infra.servicio_ocr import ServicioOCR
@@ -16,19 +17,23 @@ class ProcesadorFacturas:
 
     def buscar_facturas_en_carpeta(self, ruta_carpeta: str) -> List[Factura]:
         """
-        1. Pide al repositorio las rutas de archivos.
+        1. Pide al repositorio las rutas de archivos (y miembros de ZIP).
         2. Convierte esas rutas en objetos 'Factura' vacíos.
         """
         rutas_archivos = self.repositorio.obtener_rutas_facturas(ruta_carpeta)
         
         lista_facturas = []
         if rutas_archivos:
-            for ruta in rutas_archivos:
-                nombre_archivo = ruta.split("\\")[-1] 
+            for ruta_archivo, miembro in rutas_archivos:
+                if miembro:
+                    nombre_archivo = PurePosixPath(miembro).name
+                else:
+                    nombre_archivo = ruta_archivo.split("\\")[-1] 
                 
                 nueva_factura = Factura(
-                    ruta_archivo=ruta,
-                    nombre_archivo=nombre_archivo
+                    ruta_archivo=ruta_archivo,
+                    nombre_archivo=nombre_archivo,
+                    miembro_archivo=miembro
                 )
                 lista_facturas.append(nueva_factura)
             
@@ -37,9 +42,16 @@ class ProcesadorFacturas:
     def procesar_factura(self, factura: Factura) -> Factura:
         """
         Toma una factura, extrae su texto y parsea los datos clave.
+        Si el archivo (o el miembro del ZIP) no se puede leer, no lanza
+        excepción: la factura queda con texto vacío y es_valida=False.
         """
         # 1. Extraer texto crudo (ahora intentará texto nativo con orden visual)
-        texto_extraido = self.ocr.extraer_texto_imagen(factura.ruta_archivo)
+        if factura.miembro_archivo:
+            # Documento dentro de un ZIP: se lee en memoria, sin extraer a disco
+            datos = self.repositorio.leer_miembro_zip(factura.ruta_archivo, factura.miembro_archivo)
+            texto_extraido = self.ocr.extraer_texto_bytes(datos, factura.miembro_archivo)
+        else:
+            texto_extraido = self.ocr.extraer_texto_imagen(factura.ruta_archivo)
         factura.texto_crudo = texto_extraido
         
         # 2. Parsear datos del texto
@@ -63,6 +75,13 @@ class ProcesadorFacturas:
 
         return factura
 
+    def finalizar_lote(self) -> None:
+        """
+        Libera los recursos abiertos durante un lote (ZIPs en caché).
+        Llamar al terminar de procesar una tanda de facturas.
+        """
+        self.repositorio.cerrar_archivos_comprimidos()
+
     def _parsear_datos(self, texto: str) -> dict:
         """
         Aplica Expresiones Regulares para extraer información estructurada con lógica mejorada.
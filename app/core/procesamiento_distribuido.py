@@ -0,0 +1,186 @@
+import os
+import socket
+import threading
+import time
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+from app.core.entidades import Factura, TareaCola
+from app.core.procesador_facturas import ProcesadorFacturas
+from app.infra.cola_trabajo import ColaNoDisponible, ColaTrabajo
+
+
+class CoordinadorDistribuido:
+    """
+    Caso de Uso: Repartir una carpeta de facturas en la cola compartida
+    y consultar el avance / resultados.
+
+    Si se indica 'raiz_compartida', las rutas se guardan relativas a esa
+    carpeta y cada trabajador las resuelve contra su propia raíz (otra letra
+    de unidad o punto de montaje). Sin raíz se guardan rutas absolutas, que
+    deben ser válidas tal cual en todas las máquinas.
+    """
+
+    def __init__(self, cola: ColaTrabajo, procesador: Optional[ProcesadorFacturas] = None,
+                 raiz_compartida: Optional[str] = None):
+        self.cola = cola
+        self.procesador = procesador or ProcesadorFacturas()
+        self.raiz_compartida = raiz_compartida
+
+    def encolar_carpeta(self, ruta_carpeta: str) -> int:
+        """
+        Busca las facturas de la carpeta y las agrega a la cola.
+        Devuelve la cantidad de tareas nuevas.
+        """
+        facturas = self.procesador.buscar_facturas_en_carpeta(ruta_carpeta)
+        if self.raiz_compartida:
+            for factura in facturas:
+                factura.ruta_archivo = self._ruta_relativa(factura.ruta_archivo)
+        nuevas = self.cola.encolar(facturas)
+        print(f"✅ [Coordinador] {nuevas} facturas nuevas encoladas ({len(facturas)} encontradas).")
+        return nuevas
+
+    def _ruta_relativa(self, ruta: str) -> str:
+        """Ruta relativa a la raíz compartida, siempre con '/' para que sirva en cualquier SO."""
+        try:
+            return Path(ruta).absolute().relative_to(Path(self.raiz_compartida).absolute()).as_posix()
+        except ValueError:
+            raise ValueError(f"El archivo {ruta} no está dentro de la raíz compartida {self.raiz_compartida}")
+
+    def estado(self) -> Dict[str, int]:
+        return self.cola.resumen()
+
+    def resultados(self) -> List[Factura]:
+        return self.cola.obtener_resultados()
+
+    def errores(self) -> List[Dict[str, object]]:
+        return self.cola.obtener_errores()
+
+
+class TrabajadorDistribuido:
+    """
+    Caso de Uso: Tomar facturas de la cola compartida, procesarlas con
+    'ProcesadorFacturas.procesar_factura' y devolver el resultado a la cola.
+    Mientras procesa, renueva el lease en segundo plano.
+    Un archivo inexistente en esta máquina o sin texto extraíble cuenta
+    como error: la tarea se reintenta y, agotados los intentos, queda fallida.
+    """
+
+    def __init__(
+        self,
+        cola: ColaTrabajo,
+        procesador: Optional[ProcesadorFacturas] = None,
+        nombre: Optional[str] = None,
+        duracion_lease: float = 300.0,
+        raiz_compartida: Optional[str] = None,
+    ):
+        self.cola = cola
+        self.procesador = procesador or ProcesadorFacturas()
+        self.nombre = nombre or f"{socket.gethostname()}-{os.getpid()}"
+        self.duracion_lease = duracion_lease
+        # Raíz local de la carpeta compartida (ver CoordinadorDistribuido)
+        self.raiz_compartida = raiz_compartida
+
+    def ejecutar(self, max_tareas: Optional[int] = None, esperar_trabajo: bool = False,
+                 intervalo_espera: float = 5.0, max_errores_cola: int = 5) -> int:
+        """
+        Procesa tareas hasta vaciar la cola (o hasta 'max_tareas').
+        Con 'esperar_trabajo' queda consultando la cola indefinidamente.
+        Devuelve la cantidad de tareas procesadas.
+        Si la cola no está disponible (lock ocupado, carpeta compartida caída)
+        espera y reintenta. Sin 'esperar_trabajo', tras 'max_errores_cola'
+        errores seguidos relanza ColaNoDisponible; con 'esperar_trabajo'
+        reintenta siempre.
+        """
+        procesadas = 0
+        errores_seguidos = 0
+        while max_tareas is None or procesadas < max_tareas:
+            try:
+                tarea = self.cola.tomar_tarea(self.nombre, self.duracion_lease)
+                if tarea is None:
+                    # Cola vacía: liberamos los ZIPs abiertos mientras esperamos
+                    self.procesador.finalizar_lote()
+                    if not esperar_trabajo:
+                        break
+                    time.sleep(intervalo_espera)
+                    continue
+
+                self.procesar_tarea(tarea)
+                procesadas += 1
+                errores_seguidos = 0
+            except ColaNoDisponible as e:
+                # Si falló 'completar'/'fallar', el lease vence y la tarea se vuelve a repartir
+                errores_seguidos += 1
+                if not esperar_trabajo and errores_seguidos >= max_errores_cola:
+                    print(f"❌ [Trabajador {self.nombre}] Cola no disponible tras {errores_seguidos} intentos: {e}")
+                    raise
+                print(f"⚠️ [Trabajador {self.nombre}] Cola no disponible ({e}). Reintentando en {intervalo_espera}s.")
+                time.sleep(intervalo_espera)
+
+        print(f"✅ [Trabajador {self.nombre}] Finalizado. Tareas procesadas: {procesadas}")
+        return procesadas
+
+    def procesar_tarea(self, tarea: TareaCola) -> bool:
+        """Procesa una tarea reservada. Devuelve True si se completó."""
+        detener_renovacion = threading.Event()
+        hilo_lease = threading.Thread(
+            target=self._renovar_lease_periodicamente,
+            args=(tarea, detener_renovacion),
+            daemon=True,
+        )
+        hilo_lease.start()
+
+        try:
+            ruta_archivo = self._resolver_ruta(tarea.ruta_archivo)
+            if not os.path.isfile(ruta_archivo):
+                raise FileNotFoundError(
+                    f"No existe en este equipo: {ruta_archivo} (verifique la raíz compartida)"
+                )
+
+            factura = Factura(
+                ruta_archivo=ruta_archivo,
+                nombre_archivo=tarea.nombre_archivo,
+                miembro_archivo=tarea.miembro_archivo,
+            )
+            self.procesador.procesar_factura(factura)
+
+            # ServicioOCR no lanza excepciones: devuelve "" si no pudo leer el archivo
+            if not factura.texto_crudo:
+                raise ValueError(f"No se pudo extraer texto de {tarea.nombre_archivo}")
+        except Exception as e:
+            print(f"❌ [Trabajador {self.nombre}] Error procesando {tarea.nombre_archivo}: {e}")
+            detener_renovacion.set()
+            hilo_lease.join()
+            self.cola.fallar(tarea, str(e))
+            return False
+
+        detener_renovacion.set()
+        hilo_lease.join()
+
+        # Guardamos la ruta de la cola, no la local de este equipo, para que los
+        # resultados de distintas máquinas coincidan entre sí y con los errores
+        factura.ruta_archivo = tarea.ruta_archivo
+        if not self.cola.completar(tarea, factura):
+            # Perdimos el lease: otro trabajador ya tomó la tarea
+            print(f"⚠️ [Trabajador {self.nombre}] Lease perdido para {tarea.nombre_archivo}, se descarta el resultado.")
+            return False
+        return True
+
+    def _resolver_ruta(self, ruta: str) -> str:
+        """Convierte la ruta guardada en la cola en una ruta local de este equipo."""
+        if self.raiz_compartida:
+            return str(Path(self.raiz_compartida, *PurePosixPath(ruta).parts))
+        if not os.path.isabs(ruta):
+            raise ValueError(f"La tarea tiene una ruta relativa ({ruta}): indique la raíz compartida del trabajador")
+        return ruta
+
+    def _renovar_lease_periodicamente(self, tarea: TareaCola, detener: threading.Event) -> None:
+        """Corre en un hilo aparte mientras se procesa la tarea."""
+        intervalo = self.duracion_lease / 3
+        while not detener.wait(intervalo):
+            try:
+                if not self.cola.renovar_lease(tarea, self.duracion_lease):
+                    return
+            except Exception as e:
+                # Carpeta compartida momentáneamente inaccesible: reintentamos en el próximo ciclo
+                print(f"⚠️ [Trabajador {self.nombre}] No se pudo renovar el lease: {e}")
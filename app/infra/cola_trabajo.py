@@ -0,0 +1,336 @@
+import functools
+import json
+import sqlite3
+from dataclasses import asdict, fields
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from app.core.entidades import Factura, TareaCola
+
+ESTADO_PENDIENTE = "pendiente"
+ESTADO_EN_PROCESO = "en_proceso"
+ESTADO_COMPLETADA = "completada"
+ESTADO_FALLIDA = "fallida"
+
+# Fuente de tiempo de la cola (segundos Unix, evaluados por SQLite).
+# Todos los timestamps (leases, 'actualizado') se calculan con esta expresión
+# dentro de las consultas, nunca con time.time() de Python. SQLite igual lee el
+# reloj de la máquina que ejecuta la consulta, así que en modo multi-máquina
+# TODOS los equipos deben sincronizar la hora por NTP: con un desfase del orden
+# de la duración del lease, una máquina adelantada re-reparte tareas que otro
+# trabajador todavía tiene, y una atrasada deja tareas trabadas más tiempo.
+# Usamos julianday() en lugar de unixepoch() para soportar SQLite < 3.38.
+AHORA_SQL = "((julianday('now') - 2440587.5) * 86400.0)"
+
+_CREAR_TABLA_TAREAS = """
+    CREATE TABLE IF NOT EXISTS tareas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ruta_archivo TEXT NOT NULL,
+        miembro_archivo TEXT NOT NULL DEFAULT '',
+        nombre_archivo TEXT NOT NULL,
+        estado TEXT NOT NULL,
+        intentos INTEGER NOT NULL DEFAULT 0,
+        trabajador TEXT,
+        lease_expira REAL,
+        resultado TEXT,
+        error TEXT,
+        actualizado REAL NOT NULL,
+        UNIQUE (ruta_archivo, miembro_archivo)
+    )
+"""
+
+
+class ColaNoDisponible(Exception):
+    """
+    La cola no se pudo usar en este momento: lock ocupado que no se liberó
+    a tiempo, carpeta compartida caída o archivo .db inaccesible.
+    """
+
+
+def _traducir_errores_sqlite(metodo):
+    """Convierte los errores operativos de SQLite en 'ColaNoDisponible'."""
+    @functools.wraps(metodo)
+    def envoltorio(*args, **kwargs):
+        try:
+            return metodo(*args, **kwargs)
+        except sqlite3.OperationalError as e:
+            raise ColaNoDisponible(str(e)) from e
+    return envoltorio
+
+
+class ColaTrabajo:
+    """
+    Cola de trabajo compartida sobre SQLite.
+    El archivo .db puede vivir en una carpeta compartida para que varios
+    trabajadores (en una o varias máquinas) tomen facturas con un 'lease'.
+    Si un trabajador muere, su lease expira y la tarea vuelve a repartirse.
+    """
+
+    def __init__(self, ruta_db: str, max_intentos: int = 3, timeout: float = 30.0):
+        self.ruta_db = ruta_db
+        self.max_intentos = max_intentos
+        self.timeout = timeout
+        self._crear_esquema()
+
+    def _conectar(self) -> sqlite3.Connection:
+        # isolation_level=None: controlamos las transacciones a mano (BEGIN IMMEDIATE)
+        # No usamos WAL porque no funciona sobre carpetas de red.
+        conexion = sqlite3.connect(self.ruta_db, timeout=self.timeout, isolation_level=None)
+        conexion.row_factory = sqlite3.Row
+        return conexion
+
+    @_traducir_errores_sqlite
+    def _crear_esquema(self) -> None:
+        conexion = self._conectar()
+        try:
+            # Bajo lock de escritura: varios procesos pueden arrancar a la vez
+            conexion.execute("BEGIN IMMEDIATE")
+            columnas = {fila["name"] for fila in conexion.execute("PRAGMA table_info(tareas)")}
+            if columnas and "miembro_archivo" not in columnas:
+                self._migrar_sin_miembro_archivo(conexion)
+            else:
+                conexion.execute(_CREAR_TABLA_TAREAS)
+            conexion.execute("CREATE INDEX IF NOT EXISTS idx_tareas_estado ON tareas (estado)")
+            conexion.execute("COMMIT")
+        except Exception:
+            if conexion.in_transaction:
+                conexion.execute("ROLLBACK")
+            raise
+        finally:
+            conexion.close()
+
+    def _migrar_sin_miembro_archivo(self, conexion: sqlite3.Connection) -> None:
+        """
+        Colas creadas antes del soporte de ZIP: la clave única pasó de
+        'ruta_archivo' a '(ruta_archivo, miembro_archivo)'. Como SQLite no
+        permite cambiar una restricción con ALTER TABLE, se recrea la tabla.
+        """
+        print(f"⚠️ [Infra] Migrando la cola {self.ruta_db} al formato con miembro_archivo.")
+        conexion.execute("ALTER TABLE tareas RENAME TO tareas_anterior")
+        conexion.execute(_CREAR_TABLA_TAREAS)
+        columnas_copiadas = (
+            "id, ruta_archivo, nombre_archivo, estado, intentos, trabajador, "
+            "lease_expira, resultado, error, actualizado"
+        )
+        conexion.execute(
+            f"INSERT INTO tareas ({columnas_copiadas}) SELECT {columnas_copiadas} FROM tareas_anterior"
+        )
+        conexion.execute("DROP TABLE tareas_anterior")
+
+    @_traducir_errores_sqlite
+    def encolar(self, facturas: Iterable[Factura]) -> int:
+        """
+        Agrega las facturas a la cola. Las rutas ya encoladas se ignoran.
+        Devuelve la cantidad de tareas nuevas.
+        """
+        # miembro_archivo se guarda como '' (no NULL) para que el UNIQUE detecte duplicados
+        filas = [
+            (f.ruta_archivo, f.miembro_archivo or "", f.nombre_archivo, ESTADO_PENDIENTE)
+            for f in facturas
+        ]
+        conexion = self._conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            antes = conexion.total_changes
+            conexion.executemany(
+                "INSERT OR IGNORE INTO tareas (ruta_archivo, miembro_archivo, nombre_archivo, estado, actualizado) "
+                f"VALUES (?, ?, ?, ?, {AHORA_SQL})",
+                filas,
+            )
+            nuevas = conexion.total_changes - antes
+            conexion.execute("COMMIT")
+            return nuevas
+        except Exception:
+            # Si BEGIN IMMEDIATE venció esperando el lock no hay transacción abierta
+            if conexion.in_transaction:
+                conexion.execute("ROLLBACK")
+            raise
+        finally:
+            conexion.close()
+
+    @_traducir_errores_sqlite
+    def tomar_tarea(self, trabajador: str, duracion_lease: float) -> Optional[TareaCola]:
+        """
+        Reserva la próxima tarea disponible (pendiente o con lease vencido)
+        para el trabajador indicado. Devuelve None si no hay trabajo.
+        """
+        conexion = self._conectar()
+        try:
+            # BEGIN IMMEDIATE toma el lock de escritura: dos trabajadores no pueden
+            # reservar la misma fila.
+            conexion.execute("BEGIN IMMEDIATE")
+            # Una sola lectura del reloj para toda la transacción (ver AHORA_SQL)
+            ahora = conexion.execute(f"SELECT {AHORA_SQL}").fetchone()[0]
+
+            # Leases vencidos que ya agotaron sus intentos pasan a fallida
+            conexion.execute(
+                "UPDATE tareas SET estado = ?, error = ?, trabajador = NULL, lease_expira = NULL, actualizado = ? "
+                "WHERE estado = ? AND lease_expira < ? AND intentos >= ?",
+                (ESTADO_FALLIDA, "Lease vencido sin más reintentos", ahora,
+                 ESTADO_EN_PROCESO, ahora, self.max_intentos),
+            )
+
+            fila = conexion.execute(
+                "SELECT id, ruta_archivo, miembro_archivo, nombre_archivo, intentos FROM tareas "
+                "WHERE estado = ? OR (estado = ? AND lease_expira < ?) "
+                "ORDER BY id LIMIT 1",
+                (ESTADO_PENDIENTE, ESTADO_EN_PROCESO, ahora),
+            ).fetchone()
+
+            if fila is None:
+                conexion.execute("COMMIT")
+                return None
+
+            lease_expira = ahora + duracion_lease
+            conexion.execute(
+                "UPDATE tareas SET estado = ?, intentos = intentos + 1, trabajador = ?, "
+                "lease_expira = ?, actualizado = ? WHERE id = ?",
+                (ESTADO_EN_PROCESO, trabajador, lease_expira, ahora, fila["id"]),
+            )
+            conexion.execute("COMMIT")
+
+            return TareaCola(
+                id=fila["id"],
+                ruta_archivo=fila["ruta_archivo"],
+                nombre_archivo=fila["nombre_archivo"],
+                miembro_archivo=fila["miembro_archivo"] or None,
+                intentos=fila["intentos"] + 1,
+                trabajador=trabajador,
+                lease_expira=lease_expira,
+            )
+        except Exception:
+            # Si BEGIN IMMEDIATE venció esperando el lock no hay transacción abierta
+            if conexion.in_transaction:
+                conexion.execute("ROLLBACK")
+            raise
+        finally:
+            conexion.close()
+
+    @_traducir_errores_sqlite
+    def renovar_lease(self, tarea: TareaCola, duracion_lease: float) -> bool:
+        """
+        Extiende el lease de una tarea en curso. Devuelve False si el
+        trabajador ya perdió la tarea (lease vencido y reasignado).
+        """
+        conexion = self._conectar()
+        try:
+            conexion.execute("BEGIN IMMEDIATE")
+            ahora = conexion.execute(f"SELECT {AHORA_SQL}").fetchone()[0]
+            actualizada = self._actualizar_si_propia(
+                conexion,
+                tarea,
+                "lease_expira = ?, actualizado = ?",
+                (ahora + duracion_lease, ahora),
+            )
+            conexion.execute("COMMIT")
+            if actualizada:
+                tarea.lease_expira = ahora + duracion_lease
+            return actualizada
+        except Exception:
+            if conexion.in_transaction:
+                conexion.execute("ROLLBACK")
+            raise
+        finally:
+            conexion.close()
+
+    @_traducir_errores_sqlite
+    def completar(self, tarea: TareaCola, factura: Factura) -> bool:
+        """Guarda el resultado de la factura procesada y cierra la tarea."""
+        conexion = self._conectar()
+        try:
+            return self._actualizar_si_propia(
+                conexion,
+                tarea,
+                f"estado = ?, resultado = ?, error = NULL, lease_expira = NULL, actualizado = {AHORA_SQL}",
+                (ESTADO_COMPLETADA, self._serializar_factura(factura)),
+            )
+        finally:
+            conexion.close()
+
+    @_traducir_errores_sqlite
+    def fallar(self, tarea: TareaCola, error: str) -> bool:
+        """
+        Registra un error. Si quedan intentos la tarea vuelve a pendiente,
+        si no queda marcada como fallida.
+        """
+        estado = ESTADO_PENDIENTE if tarea.intentos < self.max_intentos else ESTADO_FALLIDA
+        conexion = self._conectar()
+        try:
+            return self._actualizar_si_propia(
+                conexion,
+                tarea,
+                f"estado = ?, error = ?, trabajador = NULL, lease_expira = NULL, actualizado = {AHORA_SQL}",
+                (estado, error),
+            )
+        finally:
+            conexion.close()
+
+    def _actualizar_si_propia(self, conexion: sqlite3.Connection, tarea: TareaCola,
+                              asignaciones: str, valores: tuple) -> bool:
+        """Aplica el UPDATE solo si la tarea sigue reservada por este trabajador."""
+        cursor = conexion.execute(
+            f"UPDATE tareas SET {asignaciones} WHERE id = ? AND estado = ? AND trabajador = ? AND intentos = ?",
+            valores + (tarea.id, ESTADO_EN_PROCESO, tarea.trabajador, tarea.intentos),
+        )
+        return cursor.rowcount == 1
+
+    @_traducir_errores_sqlite
+    def resumen(self) -> Dict[str, int]:
+        """Cantidad de tareas por estado."""
+        conexion = self._conectar()
+        try:
+            conteo = {ESTADO_PENDIENTE: 0, ESTADO_EN_PROCESO: 0, ESTADO_COMPLETADA: 0, ESTADO_FALLIDA: 0}
+            for fila in conexion.execute("SELECT estado, COUNT(*) AS cantidad FROM tareas GROUP BY estado"):
+                conteo[fila["estado"]] = fila["cantidad"]
+            return conteo
+        finally:
+            conexion.close()
+
+    @_traducir_errores_sqlite
+    def obtener_resultados(self) -> List[Factura]:
+        """Devuelve las facturas ya procesadas por los trabajadores."""
+        conexion = self._conectar()
+        try:
+            filas = conexion.execute(
+                "SELECT resultado FROM tareas WHERE estado = ? ORDER BY id", (ESTADO_COMPLETADA,)
+            ).fetchall()
+            return [self._deserializar_factura(fila["resultado"]) for fila in filas]
+        finally:
+            conexion.close()
+
+    @_traducir_errores_sqlite
+    def obtener_errores(self) -> List[Dict[str, object]]:
+        """Tareas fallidas con el último error registrado."""
+        conexion = self._conectar()
+        try:
+            filas = conexion.execute(
+                "SELECT ruta_archivo, miembro_archivo, nombre_archivo, intentos, error "
+                "FROM tareas WHERE estado = ? ORDER BY id",
+                (ESTADO_FALLIDA,),
+            ).fetchall()
+            return [
+                {
+                    "ruta_archivo": fila["ruta_archivo"],
+                    "miembro_archivo": fila["miembro_archivo"] or None,
+                    "nombre_archivo": fila["nombre_archivo"],
+                    "intentos": fila["intentos"],
+                    "error": fila["error"],
+                }
+                for fila in filas
+            ]
+        finally:
+            conexion.close()
+
+    def _serializar_factura(self, factura: Factura) -> str:
+        datos = asdict(factura)
+        datos["fecha_procesamiento"] = factura.fecha_procesamiento.isoformat()
+        return json.dumps(datos, ensure_ascii=False)
+
+    def _deserializar_factura(self, texto: str) -> Factura:
+        datos = json.loads(texto)
+        # Ignoramos campos desconocidos (trabajadores con otra versión)
+        nombres_validos = {f.name for f in fields(Factura)}
+        datos = {k: v for k, v in datos.items() if k in nombres_validos}
+        if datos.get("fecha_procesamiento"):
+            datos["fecha_procesamiento"] = datetime.fromisoformat(datos["fecha_procesamiento"])
+        return Factura(**datos)
@@ -1,6 +1,13 @@
 import os
-from pathlib import Path
-from typing import List
+import zipfile
+import zlib
+from collections import OrderedDict
+from pathlib import Path, PurePosixPath
+from typing import List, Optional, Tuple
+
+# Documento encontrado: (ruta en disco, miembro dentro del ZIP o None)
+DocumentoEncontrado = Tuple[str, Optional[str]]
+
 
 class RepositorioArchivos:
     """
@@ -11,11 +18,19 @@ class RepositorioArchivos:
     def __init__(self):
         # Extensiones permitidas para procesar
         self.extensiones_validas = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff'}
+        # Archivos comprimidos cuyo contenido se lista sin extraer a disco
+        self.extensiones_archivo_comprimido = {'.zip'}
+        # ZIPs abiertos durante un lote: evita re-leer el índice central por cada miembro.
+        # Clave: ruta del ZIP, Valor: (mtime al abrirlo, ZipFile)
+        self._zips_abiertos: "OrderedDict[str, Tuple[float, zipfile.ZipFile]]" = OrderedDict()
+        self.max_zips_abiertos = 4
 
-    def obtener_rutas_facturas(self, ruta_carpeta: str) -> List[str]:
+    def obtener_rutas_facturas(self, ruta_carpeta: str) -> List[DocumentoEncontrado]:
         """
-        Escanea una carpeta y devuelve una lista con las rutas completas
+        Escanea una carpeta y devuelve una lista de pares (ruta, miembro)
         de los archivos válidos (imágenes/PDF).
+        Para archivos sueltos 'miembro' es None; para documentos dentro de
+        un ZIP 'ruta' es el ZIP y 'miembro' la ruta interna.
         """
         archivos_encontrados = []
         path_carpeta = Path(ruta_carpeta)
@@ -27,8 +42,12 @@ class RepositorioArchivos:
         try:
             # Iteramos sobre los archivos en el directorio
             for archivo in path_carpeta.iterdir():
-                if archivo.is_file() and archivo.suffix.lower() in self.extensiones_validas:
-                    archivos_encontrados.append(str(archivo.absolute()))
+                if not archivo.is_file():
+                    continue
+                if archivo.suffix.lower() in self.extensiones_validas:
+                    archivos_encontrados.append((str(archivo.absolute()), None))
+                elif archivo.suffix.lower() in self.extensiones_archivo_comprimido:
+                    archivos_encontrados.extend(self._listar_miembros_zip(str(archivo.absolute())))
             
             print(f"✅ [Infra] Se encontraron {len(archivos_encontrados)} documentos en {ruta_carpeta}")
             return archivos_encontrados
@@ -38,4 +57,75 @@ class RepositorioArchivos:
             return []
         except Exception as e:
             print(f"🔥 [Error Infra] Error inesperado leyendo archivos: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def _listar_miembros_zip(self, ruta_zip: str) -> List[DocumentoEncontrado]:
+        """
+        Lista los documentos válidos dentro de un ZIP como pares (ruta_zip, miembro).
+        Solo lee el índice central del ZIP, no descomprime nada.
+        """
+        try:
+            miembros = []
+            with zipfile.ZipFile(ruta_zip) as archivo_zip:
+                for info in archivo_zip.infolist():
+                    if info.is_dir() or PurePosixPath(info.filename).suffix.lower() not in self.extensiones_validas:
+                        continue
+                    if info.flag_bits & 0x1:
+                        # Miembro cifrado: sin contraseña 'read' siempre falla
+                        print(f"⚠️ [Infra] Documento cifrado dentro del ZIP, se omite: {ruta_zip} -> {info.filename}")
+                        continue
+                    miembros.append((ruta_zip, info.filename))
+            return miembros
+        except zipfile.BadZipFile:
+            print(f"⚠️ [Infra] ZIP dañado o inválido, se omite: {ruta_zip}")
+            return []
+        except OSError as e:
+            # Un ZIP bloqueado o ilegible no debe descartar el resto de la carpeta
+            print(f"⚠️ [Infra] No se pudo leer el ZIP, se omite: {ruta_zip} ({e})")
+            return []
+
+    def leer_miembro_zip(self, ruta_zip: str, miembro: str) -> bytes:
+        """
+        Devuelve el contenido de un miembro del ZIP en memoria,
+        sin escribir archivos temporales.
+        El ZIP queda abierto hasta 'cerrar_archivos_comprimidos' para que los
+        miembros siguientes del mismo archivo no vuelvan a parsear el índice.
+        Igual que ServicioOCR con los archivos sueltos, no lanza excepciones:
+        si el miembro no se puede leer devuelve b"".
+        """
+        try:
+            return self._obtener_zip_abierto(ruta_zip).read(miembro)
+        except (KeyError, zipfile.BadZipFile, zlib.error, RuntimeError, OSError) as e:
+            print(f"🔥 [Error Infra] No se pudo leer {miembro} dentro de {ruta_zip}: {e}")
+            self._descartar_zip(ruta_zip)
+            return b""
+
+    def cerrar_archivos_comprimidos(self) -> None:
+        """Cierra los ZIPs abiertos (al terminar un lote, para liberar los archivos)."""
+        for _, archivo_zip in self._zips_abiertos.values():
+            archivo_zip.close()
+        self._zips_abiertos.clear()
+
+    def _descartar_zip(self, ruta_zip: str) -> None:
+        """Cierra y olvida un ZIP en caché (ej. tras un error de lectura)."""
+        abierto = self._zips_abiertos.pop(ruta_zip, None)
+        if abierto:
+            abierto[1].close()
+
+    def _obtener_zip_abierto(self, ruta_zip: str) -> zipfile.ZipFile:
+        mtime = os.stat(ruta_zip).st_mtime
+        abierto = self._zips_abiertos.get(ruta_zip)
+        if abierto and abierto[0] == mtime:
+            self._zips_abiertos.move_to_end(ruta_zip)
+            return abierto[1]
+
+        if abierto:
+            # El ZIP cambió en disco desde que lo abrimos
+            self._descartar_zip(ruta_zip)
+
+        archivo_zip = zipfile.ZipFile(ruta_zip)
+        self._zips_abiertos[ruta_zip] = (mtime, archivo_zip)
+        while len(self._zips_abiertos) > self.max_zips_abiertos:
+            _, (_, mas_antiguo) = self._zips_abiertos.popitem(last=False)
+            mas_antiguo.close()
+        return archivo_zip
@@ -0,0 +1,29 @@
+from dataclasses import asdict
+from typing import Dict, List
+
+import pandas as pd
+
+from app.core.entidades import Factura
+
+
+class RepositorioExcel:
+    """
+    Encargado de exportar los resultados del procesamiento a planillas Excel.
+    """
+
+    def exportar_resultados(self, facturas: List[Factura], errores: List[Dict[str, object]], ruta_excel: str) -> None:
+        """
+        Escribe una hoja 'Facturas' con los datos extraídos y una hoja
+        'Errores' con las tareas que no se pudieron procesar.
+        """
+        # El texto crudo no aporta en la planilla y puede superar el límite de celda
+        filas_facturas = [{k: v for k, v in asdict(f).items() if k != "texto_crudo"} for f in facturas]
+        columnas_errores = ["ruta_archivo", "miembro_archivo", "nombre_archivo", "intentos", "error"]
+
+        try:
+            with pd.ExcelWriter(ruta_excel, engine="openpyxl") as writer:
+                pd.DataFrame(filas_facturas).to_excel(writer, sheet_name="Facturas", index=False)
+                pd.DataFrame(errores, columns=columnas_errores).to_excel(writer, sheet_name="Errores", index=False)
+            print(f"✅ [Infra] Resultados exportados a {ruta_excel}")
+        except PermissionError:
+            print(f"⛔ [Error Infra] No se pudo escribir {ruta_excel} (¿está abierto en Excel?)")
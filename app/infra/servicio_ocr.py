@@ -33,6 +33,28 @@ class ServicioOCR:
             print(f"🔥 [Error OCR] Falló al leer {ruta_archivo}: {e}")
             return ""
 
+    def extraer_texto_bytes(self, datos: bytes, nombre_archivo: str) -> str:
+        """
+        Igual que 'extraer_texto_imagen' pero desde un buffer en memoria
+        (ej. un miembro de un ZIP), sin escribir archivos temporales.
+        El nombre solo se usa para detectar el tipo y para los mensajes.
+        """
+        if not datos:
+            return ""
+
+        try:
+            ext = os.path.splitext(nombre_archivo)[1].lower()
+
+            if ext == '.pdf':
+                return self._procesar_pdf_bytes(datos, nombre_archivo)
+
+            imagen = Image.open(io.BytesIO(datos))
+            return pytesseract.image_to_string(imagen, lang='spa')
+
+        except Exception as e:
+            print(f"🔥 [Error OCR] Falló al leer {nombre_archivo}: {e}")
+            return ""
+
     def _es_texto_valido(self, texto: str) -> bool:
         """
         Verifica si el texto extraído parece válido (no es basura/mojibake).
@@ -56,9 +78,29 @@ class ServicioOCR:
         Intenta extraer texto nativo del PDF. Si no hay suficiente texto
         o el texto parece corrupto, renderiza como imagen y ejecuta OCR.
         """
-        texto_acumulado = []
         try:
             doc = fitz.open(ruta_pdf)
+            return self._procesar_documento(doc, os.path.basename(ruta_pdf))
+        except Exception as e:
+            print(f"Error procesando PDF interno: {e}")
+            return ""
+
+    def _procesar_pdf_bytes(self, datos: bytes, nombre_archivo: str) -> str:
+        """Igual que '_procesar_pdf' pero abriendo el PDF desde memoria."""
+        try:
+            doc = fitz.open(stream=datos, filetype="pdf")
+            return self._procesar_documento(doc, nombre_archivo)
+        except Exception as e:
+            print(f"Error procesando PDF interno: {e}")
+            return ""
+
+    def _procesar_documento(self, doc, nombre_archivo: str) -> str:
+        """
+        Recorre las páginas de un documento PyMuPDF ya abierto:
+        texto nativo con orden visual y OCR como respaldo.
+        """
+        texto_acumulado = []
+        try:
             for pagina in doc:
                 # 1. Intentar extracción directa
                 texto_pagina = pagina.get_text("text", sort=True)
@@ -68,7 +110,7 @@ class ServicioOCR:
                 if len(texto_pagina.strip()) < 10:
                     usar_ocr = True
                 elif not self._es_texto_valido(texto_pagina):
-                    print(f"⚠️ Texto corrupto detectado en {os.path.basename(ruta_pdf)}, página {pagina.number + 1}. Forzando OCR.")
+                    print(f"⚠️ Texto corrupto detectado en {nombre_archivo}, página {pagina.number + 1}. Forzando OCR.")
                     usar_ocr = True
                 
                 if usar_ocr:
@@ -88,9 +130,6 @@ class ServicioOCR:
                 
                 texto_acumulado.append(texto_pagina)
                 
-            doc.close()
             return "\n".join(texto_acumulado)
-            
-        except Exception as e:
-            print(f"Error procesando PDF interno: {e}")
-            return ""
\ No newline at end of file
+        finally:
+            doc.close()
\ No newline at end of file
@@ -121,6 +121,8 @@ class VentanaPrincipal(ctk.CTk):
                 self.widgets_estado[idx].configure(text="❌ Error", text_color="red")
                 print(f"Error procesando {factura.nombre_archivo}: {e}")
 
+        self.procesador.finalizar_lote()
+
         # Restaurar botones (Usamos 'after' para volver al hilo principal de la UI de forma segura)
         self.after(0, lambda: self._finalizar_ui_post_proceso(errores))
 
@@ -0,0 +1,98 @@
+import argparse
+import multiprocessing
+import sys
+from typing import Dict, List, Optional
+
+from app.core.entidades import Factura
+from app.core.procesamiento_distribuido import CoordinadorDistribuido, TrabajadorDistribuido
+from app.infra.cola_trabajo import ColaTrabajo
+
+
+def _lanzar_trabajador(ruta_cola: str, max_intentos: int, duracion_lease: float, esperar: bool,
+                      raiz: Optional[str]) -> None:
+    """Punto de entrada de cada proceso trabajador (crea sus propias dependencias)."""
+    cola = ColaTrabajo(ruta_cola, max_intentos=max_intentos)
+    trabajador = TrabajadorDistribuido(cola, duracion_lease=duracion_lease, raiz_compartida=raiz)
+    trabajador.ejecutar(esperar_trabajo=esperar)
+
+
+def _mostrar_resultados(facturas: List[Factura], errores: List[Dict[str, object]]) -> None:
+    print(f"--- FACTURAS PROCESADAS ({len(facturas)}) ---")
+    for f in facturas:
+        nombre = f"{f.nombre_archivo} [{f.miembro_archivo}]" if f.miembro_archivo else f.nombre_archivo
+        print(f"{nombre} | Tipo: {f.tipo_factura} | Fecha: {f.fecha_emision} | "
+              f"Emisor: {f.emisor} ({f.cuit_emisor}) | Total: {f.importe_total}")
+
+    print(f"--- TAREAS FALLIDAS ({len(errores)}) ---")
+    for e in errores:
+        print(f"{e['ruta_archivo']} {e['miembro_archivo'] or ''} | Intentos: {e['intentos']} | Error: {e['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesamiento distribuido de facturas sobre una cola compartida.")
+    parser.add_argument("--cola", required=True, help="Ruta al archivo SQLite de la cola (puede estar en una carpeta compartida).")
+    parser.add_argument("--max-intentos", type=int, default=3)
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    p_encolar = subparsers.add_parser("encolar", help="Encola todas las facturas de una carpeta.")
+    p_encolar.add_argument("carpeta")
+    p_encolar.add_argument("--raiz", help="Carpeta compartida: las rutas se guardan relativas a ella.")
+
+    p_trabajar = subparsers.add_parser("trabajar", help="Inicia trabajadores que consumen la cola.")
+    p_trabajar.add_argument("--procesos", type=int, default=1, help="Cantidad de procesos trabajadores en esta máquina.")
+    p_trabajar.add_argument("--lease", type=float, default=300.0, help="Duración del lease en segundos.")
+    p_trabajar.add_argument("--esperar", action="store_true", help="No terminar cuando la cola está vacía.")
+    p_trabajar.add_argument("--raiz", help="Ruta local de la carpeta compartida en esta máquina.")
+
+    subparsers.add_parser("estado", help="Muestra la cantidad de tareas por estado.")
+
+    p_resultados = subparsers.add_parser("resultados", help="Lista las facturas procesadas y los errores de las fallidas.")
+    p_resultados.add_argument("--excel", help="Exporta los resultados a este archivo .xlsx en lugar de listarlos.")
+
+    args = parser.parse_args()
+
+    if args.comando == "encolar":
+        cola = ColaTrabajo(args.cola, max_intentos=args.max_intentos)
+        CoordinadorDistribuido(cola, raiz_compartida=args.raiz).encolar_carpeta(args.carpeta)
+
+    elif args.comando == "trabajar":
+        # Inicializamos el esquema antes de lanzar los procesos
+        ColaTrabajo(args.cola, max_intentos=args.max_intentos)
+        procesos = [
+            multiprocessing.Process(
+                target=_lanzar_trabajador,
+                args=(args.cola, args.max_intentos, args.lease, args.esperar, args.raiz),
+            )
+            for _ in range(args.procesos)
+        ]
+        for p in procesos:
+            p.start()
+        for p in procesos:
+            p.join()
+
+        fallidos = sum(1 for p in procesos if p.exitcode != 0)
+        if fallidos:
+            print(f"❌ {fallidos} de {len(procesos)} trabajadores terminaron con error.")
+            sys.exit(1)
+
+    elif args.comando == "estado":
+        cola = ColaTrabajo(args.cola, max_intentos=args.max_intentos)
+        for estado, cantidad in cola.resumen().items():
+            print(f"{estado}: {cantidad}")
+
+    elif args.comando == "resultados":
+        cola = ColaTrabajo(args.cola, max_intentos=args.max_intentos)
+        coordinador = CoordinadorDistribuido(cola)
+        facturas = coordinador.resultados()
+        errores = coordinador.errores()
+
+        if args.excel:
+            # Import diferido: los trabajadores no necesitan pandas
+            from app.infra.repositorio_excel import RepositorioExcel
+            RepositorioExcel().exportar_resultados(facturas, errores, args.excel)
+        else:
+            _mostrar_resultados(facturas, errores)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+from collections import Counter
+
+from app.core.entidades import Factura
+from app.core.procesamiento_distribuido import TrabajadorDistribuido
+from app.infra.cola_trabajo import ColaTrabajo
+
+CANTIDAD_TAREAS = 300
+CANTIDAD_PROCESOS = 8
+
+
+class ProcesadorSimulado:
+    """
+    Reemplaza al OCR: anota cada archivo procesado en un registro por proceso
+    para poder contar cuántas veces se procesó cada tarea.
+    """
+
+    def __init__(self, carpeta_registro: str):
+        self.ruta_registro = os.path.join(carpeta_registro, f"registro_{os.getpid()}.txt")
+
+    def procesar_factura(self, factura: Factura) -> Factura:
+        time.sleep(0.005)
+        with open(self.ruta_registro, "a", encoding="utf-8") as f:
+            f.write(factura.ruta_archivo + "\n")
+        factura.texto_crudo = f"Procesado por {os.getpid()}"
+        factura.es_valida = True
+        return factura
+
+    def finalizar_lote(self) -> None:
+        pass
+
+
+def _trabajador(ruta_db: str, carpeta_registro: str) -> None:
+    cola = ColaTrabajo(ruta_db)
+    TrabajadorDistribuido(cola, procesador=ProcesadorSimulado(carpeta_registro), duracion_lease=30).ejecutar()
+
+
+def main():
+    print("--- INICIANDO PRUEBA DE PROCESAMIENTO DISTRIBUIDO ---")
+    directorio = tempfile.mkdtemp(prefix="cola_facturas_")
+    carpeta_registro = os.path.join(directorio, "registro")
+    os.makedirs(carpeta_registro)
+    ruta_db = os.path.join(directorio, "cola.db")
+
+    # 1. Crear archivos y encolarlos
+    facturas = []
+    for i in range(CANTIDAD_TAREAS):
+        ruta = os.path.join(directorio, f"factura_{i:04d}.pdf")
+        with open(ruta, "wb") as f:
+            f.write(b"%PDF simulado")
+        facturas.append(Factura(ruta_archivo=ruta, nombre_archivo=os.path.basename(ruta)))
+
+    cola = ColaTrabajo(ruta_db)
+    assert cola.encolar(facturas) == CANTIDAD_TAREAS
+    print(f"📂 Encoladas {CANTIDAD_TAREAS} tareas en {ruta_db}")
+
+    # 2. Un trabajador "muerto" reserva una tarea y nunca la termina
+    tarea_abandonada = cola.tomar_tarea("trabajador-muerto", duracion_lease=1)
+    time.sleep(1.5)
+    print(f"💀 Lease vencido para {tarea_abandonada.nombre_archivo}")
+
+    # 3. Varios procesos consumen la cola en paralelo
+    inicio = time.time()
+    procesos = [
+        multiprocessing.Process(target=_trabajador, args=(ruta_db, carpeta_registro))
+        for _ in range(CANTIDAD_PROCESOS)
+    ]
+    for p in procesos:
+        p.start()
+    for p in procesos:
+        p.join()
+    print(f"⚙️ {CANTIDAD_PROCESOS} procesos terminaron en {time.time() - inicio:.1f}s")
+
+    # 4. Verificaciones
+    resumen = cola.resumen()
+    assert resumen["completada"] == CANTIDAD_TAREAS, f"Tareas sin completar: {resumen}"
+
+    procesadas = Counter()
+    for nombre in os.listdir(carpeta_registro):
+        with open(os.path.join(carpeta_registro, nombre), encoding="utf-8") as f:
+            procesadas.update(linea.strip() for linea in f if linea.strip())
+    assert set(procesadas) == {f.ruta_archivo for f in facturas}, "Hay tareas que no se procesaron"
+    repetidas = {ruta: n for ruta, n in procesadas.items() if n != 1}
+    assert not repetidas, f"Tareas procesadas más de una vez: {repetidas}"
+    print(f"✅ Cada tarea se procesó exactamente una vez ({len(procesadas)} archivos, {len(os.listdir(carpeta_registro))} procesos)")
+
+    conexion = sqlite3.connect(ruta_db)
+    estado, intentos, trabajador = conexion.execute(
+        "SELECT estado, intentos, trabajador FROM tareas WHERE id = ?", (tarea_abandonada.id,)
+    ).fetchone()
+    conexion.close()
+    assert estado == "completada" and intentos == 2 and trabajador != "trabajador-muerto", \
+        f"El lease vencido no se re-repartió: {estado}, {intentos}, {trabajador}"
+    print(f"✅ Lease vencido re-repartido a {trabajador}")
+
+    completo_tarde = cola.completar(tarea_abandonada, Factura(tarea_abandonada.ruta_archivo, "resultado tardío"))
+    assert not completo_tarde, "Se aceptó el 'completar' de un trabajador que perdió el lease"
+    assert all(f.nombre_archivo != "resultado tardío" for f in cola.obtener_resultados())
+    print("✅ 'completar' tardío rechazado")
+
+    print("\n--- FIN DE PRUEBA ---")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import zipfile
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from app.core.entidades import Factura
+from app.core.procesador_facturas import ProcesadorFacturas
+from app.infra import servicio_ocr
+from app.infra.cola_trabajo import ColaTrabajo
+
+TEXTO_PDF = "FACTURA A\nProveedor de Prueba SRL\nCUIT 30-12345678-9\nTotal $ 1.234,50"
+
+# Aperturas de archivos en modo escritura mientras se extrae texto (ver _auditar_escrituras)
+_escrituras = []
+_auditando = False
+
+
+def _auditar_escrituras(evento, args):
+    if _auditando and evento == "open" and len(args) > 1:
+        ruta, modo = args[0], args[1]
+        if isinstance(modo, str) and any(c in modo for c in "wax+"):
+            _escrituras.append(ruta)
+
+
+def _crear_pdf() -> bytes:
+    doc = fitz.open()
+    pagina = doc.new_page()
+    pagina.insert_text((72, 72), TEXTO_PDF)
+    datos = doc.tobytes()
+    doc.close()
+    return datos
+
+
+def _crear_png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (320, 120), "white").save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def _crear_carpeta_prueba(directorio: str) -> None:
+    with open(os.path.join(directorio, "suelta.pdf"), "wb") as f:
+        f.write(_crear_pdf())
+
+    with zipfile.ZipFile(os.path.join(directorio, "proveedor.zip"), "w") as archivo_zip:
+        archivo_zip.writestr("2024/factura.pdf", _crear_pdf())
+        archivo_zip.writestr("imagenes/ticket.png", _crear_png())
+        archivo_zip.writestr("notas.txt", "no es un documento")
+        archivo_zip.writestr("vacia/", "")
+
+    with open(os.path.join(directorio, "roto.zip"), "wb") as f:
+        f.write(b"esto no es un zip")
+
+
+def verificar_descubrimiento(procesador: ProcesadorFacturas, directorio: str) -> list:
+    print("\n🔎 Descubrimiento de documentos")
+    ruta_zip = str(os.path.abspath(os.path.join(directorio, "proveedor.zip")))
+
+    pares = set(procesador.repositorio.obtener_rutas_facturas(directorio))
+    esperados = {
+        (os.path.abspath(os.path.join(directorio, "suelta.pdf")), None),
+        (ruta_zip, "2024/factura.pdf"),
+        (ruta_zip, "imagenes/ticket.png"),
+    }
+    assert pares == esperados, f"Pares (ruta, miembro) inesperados: {pares}"
+    print("✅ Pares (ruta, miembro) correctos: sin .txt, sin carpetas, ZIP roto omitido")
+
+    facturas = procesador.buscar_facturas_en_carpeta(directorio)
+    nombres = {f.miembro_archivo: f.nombre_archivo for f in facturas}
+    assert nombres["2024/factura.pdf"] == "factura.pdf"
+    assert nombres["imagenes/ticket.png"] == "ticket.png"
+    assert nombres[None].endswith("suelta.pdf")
+    assert all(f.ruta_archivo == ruta_zip for f in facturas if f.miembro_archivo)
+    print("✅ nombre_archivo y ruta del ZIP correctos en cada Factura")
+    return facturas
+
+
+def verificar_extraccion_en_memoria(procesador: ProcesadorFacturas, facturas: list, directorio: str) -> None:
+    global _auditando
+    print("\n🧠 Extracción de texto desde memoria")
+
+    # Espiamos a Tesseract solo para confirmar que recibe la imagen decodificada del buffer
+    imagenes_ocr = []
+    image_to_string_original = servicio_ocr.pytesseract.image_to_string
+
+    def image_to_string_espia(imagen, *args, **kwargs):
+        imagenes_ocr.append(imagen.size)
+        return image_to_string_original(imagen, *args, **kwargs)
+
+    servicio_ocr.pytesseract.image_to_string = image_to_string_espia
+    archivos_antes = set(os.listdir(tempfile.gettempdir())) | set(os.listdir(directorio))
+    _auditando = True
+    try:
+        for factura in facturas:
+            if factura.miembro_archivo:
+                procesador.procesar_factura(factura)
+    finally:
+        _auditando = False
+        servicio_ocr.pytesseract.image_to_string = image_to_string_original
+    archivos_despues = set(os.listdir(tempfile.gettempdir())) | set(os.listdir(directorio))
+
+    factura_pdf = next(f for f in facturas if f.miembro_archivo == "2024/factura.pdf")
+    assert factura_pdf.texto_crudo and "Proveedor de Prueba SRL" in factura_pdf.texto_crudo, \
+        f"Texto del PDF no extraído: {factura_pdf.texto_crudo!r}"
+    assert factura_pdf.importe_total == 1234.5, f"Total inesperado: {factura_pdf.importe_total}"
+    print(f"✅ PDF leído con fitz.open(stream=...): total {factura_pdf.importe_total}")
+
+    assert imagenes_ocr == [(320, 120)], f"El PNG no llegó al OCR como imagen: {imagenes_ocr}"
+    print("✅ PNG abierto con PIL desde el buffer y enviado al OCR")
+
+    assert not _escrituras, f"Se escribieron archivos durante la extracción: {_escrituras}"
+    assert archivos_antes == archivos_despues, f"Archivos nuevos: {archivos_despues - archivos_antes}"
+    print("✅ Ningún archivo temporal escrito")
+
+
+def verificar_cache_zip(procesador: ProcesadorFacturas, directorio: str) -> None:
+    print("\n🗂️ Caché de ZIPs abiertos")
+    repositorio = procesador.repositorio
+    repositorio.cerrar_archivos_comprimidos()
+
+    rutas = []
+    for i in range(repositorio.max_zips_abiertos + 1):
+        ruta = os.path.join(directorio, f"lote_{i}.zip")
+        with zipfile.ZipFile(ruta, "w") as archivo_zip:
+            archivo_zip.writestr("a.pdf", f"contenido {i}")
+        rutas.append(ruta)
+
+    for _ in range(3):
+        assert repositorio.leer_miembro_zip(rutas[0], "a.pdf") == b"contenido 0"
+    primer_zip = repositorio._zips_abiertos[rutas[0]][1]
+    for ruta in rutas[1:]:
+        repositorio.leer_miembro_zip(ruta, "a.pdf")
+    assert len(repositorio._zips_abiertos) == repositorio.max_zips_abiertos
+    assert rutas[0] not in repositorio._zips_abiertos and primer_zip.fp is None
+    print(f"✅ Máximo {repositorio.max_zips_abiertos} ZIPs abiertos; el más antiguo se cierra")
+
+    time.sleep(0.05)  # asegurar un mtime distinto
+    with zipfile.ZipFile(rutas[-1], "a") as archivo_zip:
+        archivo_zip.writestr("nuevo.pdf", "agregado")
+    assert repositorio.leer_miembro_zip(rutas[-1], "nuevo.pdf") == b"agregado"
+    print("✅ Un ZIP modificado en disco se vuelve a abrir")
+
+    abiertos = [archivo_zip for _, archivo_zip in repositorio._zips_abiertos.values()]
+    procesador.finalizar_lote()
+    assert not repositorio._zips_abiertos and all(archivo_zip.fp is None for archivo_zip in abiertos)
+    print("✅ cerrar_archivos_comprimidos cierra todos los ZIPs")
+
+
+def verificar_migracion_cola(directorio: str) -> None:
+    print("\n🛠️ Migración de colas anteriores al soporte de ZIP")
+    ruta_db = os.path.join(directorio, "cola_vieja.db")
+
+    # Esquema original, con UNIQUE solo sobre ruta_archivo
+    conexion = sqlite3.connect(ruta_db)
+    conexion.execute(
+        """
+        CREATE TABLE tareas (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ruta_archivo TEXT NOT NULL UNIQUE,
+            nombre_archivo TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            intentos INTEGER NOT NULL DEFAULT 0,
+            trabajador TEXT,
+            lease_expira REAL,
+            resultado TEXT,
+            error TEXT,
+            actualizado REAL NOT NULL
+        )
+        """
+    )
+    conexion.executemany(
+        "INSERT INTO tareas (ruta_archivo, nombre_archivo, estado, intentos, error, actualizado) VALUES (?, ?, ?, ?, ?, 0)",
+        [("/a.pdf", "a.pdf", "pendiente", 0, None), ("/b.pdf", "b.pdf", "fallida", 3, "sin texto")],
+    )
+    conexion.commit()
+    conexion.close()
+
+    cola = ColaTrabajo(ruta_db)
+    assert cola.resumen()["pendiente"] == 1 and cola.resumen()["fallida"] == 1
+    assert cola.obtener_errores()[0]["error"] == "sin texto"
+
+    nuevas = cola.encolar([
+        Factura("/lote.zip", "x.pdf", miembro_archivo="x.pdf"),
+        Factura("/lote.zip", "y.pdf", miembro_archivo="y.pdf"),
+    ])
+    assert nuevas == 2, "La clave única no incluye miembro_archivo tras migrar"
+    print("✅ Cola vieja migrada: filas conservadas y miembros de un mismo ZIP admitidos")
+
+
+def main():
+    print("--- INICIANDO PRUEBA DE LECTURA DE ZIP ---")
+    sys.addaudithook(_auditar_escrituras)
+
+    directorio = tempfile.mkdtemp(prefix="zip_facturas_")
+    _crear_carpeta_prueba(directorio)
+    procesador = ProcesadorFacturas()
+
+    facturas = verificar_descubrimiento(procesador, directorio)
+    verificar_extraccion_en_memoria(procesador, facturas, directorio)
+    verificar_cache_zip(procesador, directorio)
+    verificar_migracion_cola(directorio)
+
+    print("\n--- FIN DE PRUEBA ---")
+
+
+if __name__ == "__main__":
+    main()